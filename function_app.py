@@ -1,6 +1,20 @@
 import azure.functions as func
+import functools
 import logging
-from sharepoint_integration.sharepoint_sam import main
+from sharepoint_integration.sharepoint_sam import build_msal_app, config_from_env, main
+
+# Validated once at load; a missing setting fails here rather than on every timer tick
+CONFIG = config_from_env()
+
+
+@functools.lru_cache(maxsize=None)
+def sp_app():
+    """
+    MSAL app shared by all invocations in this worker process
+    Built on first use because construction performs network tenant discovery
+    """
+    return build_msal_app(CONFIG)
+
 
 app = func.FunctionApp()
 
@@ -10,7 +24,7 @@ app = func.FunctionApp()
 def scheduled_sync(myTimer: func.TimerRequest) -> None:
     logging.info('Starting SharePoint sync...')
     try:
-        main()
+        main(CONFIG, sp_app())
         logging.info('Sync completed successfully')
     except Exception as e:
         logging.error(f'Sync failed: {str(e)}')
@@ -4,13 +4,26 @@ Fetches contract opportunities from SAM.gov and syncs to SharePoint list
 """
 
 import os
+import sys
+import functools
+import multiprocessing
 import time
-import json
+import asyncio
+import aiohttp
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from aiolimiter import AsyncLimiter
 from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Optional
+from contextlib import asynccontextmanager
+from urllib.parse import quote
+from typing import AsyncContextManager, AsyncIterable, AsyncIterator, Callable, Dict, List, Optional, Set, Tuple, Union
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, asdict
-from msal import ConfidentialClientApplication
+from msal import ConfidentialClientApplication, SerializableTokenCache
+from azure.core.exceptions import AzureError, ResourceExistsError, ResourceNotFoundError
+from azure.storage.blob import BlobClient, ContainerClient
 import logging
 from dotenv import load_dotenv
 
@@ -22,6 +35,8 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
+# The Azure SDK logs every HTTP request at INFO
+logging.getLogger("azure").setLevel(logging.WARNING)
 
 
 # ============================================================================
@@ -40,10 +55,62 @@ class Config:
     sharepoint_site_url: str  # https://tenant.sharepoint.com/sites/sitename
     sharepoint_list_name: str
     sam_api_base_url: str = "https://api.sam.gov/opportunities/v2/search"
+    # Persisted MSAL token cache (/home is writable and survives restarts on Azure Functions)
+    msal_cache_path: Optional[str] = "/home/data/msal_cache.bin"
+    # Small JSON state documents kept between runs (delta links, sync cursor):
+    # stored in Blob Storage when a connection string is set, else under state_dir
+    state_dir: Optional[str] = "/home/data"
+    storage_connection_string: Optional[str] = None
+    state_container: str = "sam-sync-state"
 
     # Sync settings
     days_to_sync: int = 30  # How far back to pull opportunities
-    rate_limit_delay: float = 0.11  # SAM.gov: 10 req/sec = 0.1s, use 0.11 for safety
+    # Re-read this many days before the last successful sync. postedFrom is a
+    # date on SAM.gov's US calendar, not a UTC time, so anything under a day
+    # can miss notices posted late on the day the last sync ran
+    sync_overlap_days: int = 1
+    sam_rate_limit: int = 9  # SAM.gov allows 10 req/sec; stay one below to absorb clock drift
+    sam_connection_limit: int = 10  # aiohttp connection pool size per host
+    # Adaptive (AIMD) concurrency for page requests during pagination
+    sam_initial_concurrency: int = 8
+    sam_min_concurrency: int = 1
+    sam_max_concurrency: int = 16
+    sam_target_latency: float = 2.0  # Only grow concurrency while responses are this fast (seconds)
+    sam_max_retries: int = 5  # Retries for throttled / transient failures per request
+    sam_retry_backoff: float = 1.0  # Base delay for exponential backoff (seconds)
+    sam_circuit_break_after: int = 10  # Requests in a row that exhaust their retries before giving up on SAM.gov
+    sharepoint_upload_concurrency: int = 8  # Concurrent attachment uploads to SharePoint
+    # Processes for transforming opportunities; worker start-up costs far more than
+    # the transform itself, so only raise this for very large syncs (None = CPU count)
+    transform_workers: Optional[int] = 1
+
+    def __post_init__(self):
+        """Fail fast on missing required settings"""
+        missing = [
+            name for name in (
+                "sam_api_key", "tenant_id", "client_id", "client_secret", "sharepoint_site_url"
+            )
+            if not getattr(self, name)
+        ]
+        if missing:
+            raise ValueError(f"Missing required configuration: {missing}. Check environment variables.")
+
+
+def config_from_env() -> Config:
+    """Load configuration from environment variables"""
+    return Config(
+        sam_api_key=os.getenv("SAM_API_KEY"),
+        tenant_id=os.getenv("AZURE_TENANT_ID"),
+        client_id=os.getenv("AZURE_CLIENT_ID"),
+        client_secret=os.getenv("AZURE_CLIENT_SECRET"),
+        sharepoint_site_url=os.getenv("SHAREPOINT_SITE_URL"),
+        sharepoint_list_name=os.getenv("SHAREPOINT_LIST_NAME", "SAM Opportunities"),
+        days_to_sync=int(os.getenv("DAYS_TO_SYNC", "30")),
+        msal_cache_path=os.getenv("MSAL_CACHE_PATH", "/home/data/msal_cache.bin"),
+        state_dir=os.getenv("STATE_DIR", "/home/data"),
+        storage_connection_string=os.getenv("STATE_STORAGE_CONNECTION_STRING") or os.getenv("AzureWebJobsStorage"),
+        state_container=os.getenv("STATE_CONTAINER", "sam-sync-state")
+    )
 
 
 # Set-Aside code mappings
@@ -67,20 +134,316 @@ SETASIDE_CODES = {
     "VSA": "Veteran-Owned Small Business Set-Aside",
     "VSS": "Veteran-Owned Small Business Sole source"
 }
+# Interned so every transformed item references one shared description string
+SETASIDE_CODES = {code: sys.intern(desc) for code, desc in SETASIDE_CODES.items()}
+
+
+# ============================================================================
+# SYNC STATE
+# ============================================================================
+
+def _state_blob(config: Config, name: str) -> BlobClient:
+    return BlobClient.from_connection_string(
+        config.storage_connection_string,
+        container_name=config.state_container,
+        blob_name=name
+    )
+
+
+def _load_state(config: Config, name: str) -> Optional[Dict]:
+    """Load a JSON state document saved by a previous run"""
+    if config.storage_connection_string:
+        try:
+            return orjson.loads(_state_blob(config, name).download_blob().readall())
+        except ResourceNotFoundError:
+            return None
+        except (AzureError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable state blob {name}: {str(e)}")
+            return None
+    
+    if not config.state_dir:
+        return None
+    path = os.path.join(config.state_dir, name)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable state file {path}: {str(e)}")
+        return None
+
+
+def _save_state(config: Config, name: str, data: Dict):
+    """Save a JSON state document for the next run"""
+    if config.storage_connection_string:
+        body = orjson.dumps(data)
+        try:
+            blob = _state_blob(config, name)
+            try:
+                blob.upload_blob(body, overwrite=True)
+            except ResourceNotFoundError:
+                # First run: the container doesn't exist yet
+                try:
+                    ContainerClient.from_connection_string(
+                        config.storage_connection_string, config.state_container
+                    ).create_container()
+                except ResourceExistsError:
+                    pass
+                blob.upload_blob(body, overwrite=True)
+        except (AzureError, ValueError) as e:
+            logger.warning(f"Could not save state blob {name}: {str(e)}")
+        return
+    
+    if not config.state_dir:
+        return
+    path = os.path.join(config.state_dir, name)
+    try:
+        os.makedirs(config.state_dir, exist_ok=True)
+        # Write then rename so a crash never leaves a truncated file behind
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(data))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not save state file {path}: {str(e)}")
+
+
+# State document holding the sync high-water mark
+CURSOR_STATE_NAME = "sam_sync_cursor.json"
+
+
+class CursorStore:
+    """Persists the time of the last successful sync"""
+    
+    def __init__(self, config: Config, name: str = CURSOR_STATE_NAME):
+        self.config = config
+        self.name = name
+    
+    def get(self) -> Optional[datetime]:
+        """Return the last successful sync time (UTC), if any"""
+        state = _load_state(self.config, self.name) or {}
+        value = state.get("last_successful_sync_utc")
+        if not value:
+            return None
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            logger.warning(f"Ignoring invalid sync cursor: {value}")
+            return None
+    
+    def set(self, dt: datetime):
+        """Record a successful sync that started at dt"""
+        _save_state(self.config, self.name, {"last_successful_sync_utc": dt.isoformat()})
 
 
 # ============================================================================
 # SAM.GOV API CLIENT
 # ============================================================================
 
+# Responses that signal throttling or a transient upstream failure
+SAM_RETRY_STATUSES = {429, 502, 503, 504}
+
+
+def _sam_date(dt: datetime) -> str:
+    """Format a date as SAM.gov's MM/DD/YYYY (cheaper than strftime)"""
+    return f"{dt.month:02d}/{dt.day:02d}/{dt.year}"
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds (HTTP-date form is ignored)"""
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveConcurrency:
+    """
+    Additive-increase / multiplicative-decrease limit on in-flight requests
+    Used as an async context manager around each request attempt; also acts
+    as a circuit breaker once too many requests in a row exhaust their retries
+    """
+    
+    def __init__(
+        self,
+        initial: int,
+        c_min: int,
+        c_max: int,
+        target_latency: float,
+        break_after: int,
+        alpha: float = 0.5,
+        beta: float = 0.5
+    ):
+        self.c_min = c_min
+        self.c_max = c_max
+        self.c_t = float(min(max(initial, c_min), c_max))
+        self.target_latency = target_latency
+        self.break_after = break_after
+        self.alpha = alpha
+        self.beta = beta
+        self.in_flight = 0
+        self.avg_latency: Optional[float] = None
+        self.consecutive_failures = 0
+        self._last_decrease = float("-inf")
+        self._condition: Optional[asyncio.Condition] = None
+        self._loop = None
+    
+    @property
+    def circuit_open(self) -> bool:
+        return self.consecutive_failures >= self.break_after
+    
+    def _get_condition(self) -> asyncio.Condition:
+        # asyncio primitives bind to one event loop; recreate if reused across asyncio.run calls
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._condition = asyncio.Condition()
+            self._loop = loop
+        return self._condition
+    
+    async def __aenter__(self):
+        condition = self._get_condition()
+        async with condition:
+            await condition.wait_for(lambda: self.in_flight < int(self.c_t))
+            self.in_flight += 1
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        condition = self._get_condition()
+        async with condition:
+            self.in_flight -= 1
+            # Wake everyone: the limit may have grown by more than one slot
+            condition.notify_all()
+    
+    def increase(self):
+        self.c_t = min(self.c_t + self.alpha, self.c_max)
+    
+    def decrease(self):
+        self.c_t = max(self.c_t * self.beta, self.c_min)
+    
+    def record_success(self, latency: float):
+        """Update the latency average and grow the limit if latency is on target"""
+        self.consecutive_failures = 0
+        if self.avg_latency is None:
+            self.avg_latency = latency
+        else:
+            self.avg_latency = 0.8 * self.avg_latency + 0.2 * latency
+        if self.avg_latency <= self.target_latency:
+            self.increase()
+    
+    def record_failure(self, sent_at: Optional[float] = None):
+        """
+        Back off after throttling or a transient failure
+        Requests sent (time.monotonic) before the last cut belong to the same
+        congestion event, so their failures don't cut the limit again
+        """
+        if sent_at is None or sent_at >= self._last_decrease:
+            self.decrease()
+            self._last_decrease = time.monotonic()
+    
+    def record_give_up(self):
+        """Count a request that failed even after its retries toward the breaker"""
+        self.consecutive_failures += 1
+
+
 class SAMGovClient:
     """Handles SAM.gov API requests"""
     
     def __init__(self, config: Config):
         self.config = config
-        self.session = requests.Session()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._limiter: Optional[AsyncLimiter] = None
+        self._concurrency = AdaptiveConcurrency(
+            initial=config.sam_initial_concurrency,
+            c_min=config.sam_min_concurrency,
+            c_max=config.sam_max_concurrency,
+            target_latency=config.sam_target_latency,
+            break_after=config.sam_circuit_break_after
+        )
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Lazily create the aiohttp session and rate limiter
+        Both bind to the running event loop, so they are recreated together
+        """
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit_per_host=self.config.sam_connection_limit)
+            )
+            # Shared by every outbound SAM.gov call, however many coroutines are in flight.
+            # Capacity 1 spaces requests evenly; AsyncLimiter(rate, 1) would let a
+            # full second's worth through at once on top of the steady rate
+            self._limiter = AsyncLimiter(1, 1 / self.config.sam_rate_limit)
+        return self._session
+    
+    async def close(self):
+        """Close the underlying aiohttp session"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+    
+    def _run(self, coro):
+        """Run a coroutine to completion from sync code, closing the session afterwards"""
+        async def runner():
+            try:
+                return await coro
+            finally:
+                await self.close()
+        
+        return asyncio.run(runner())
     
-    def search_opportunities(
+    async def _request(self, method: str, url: str, **kwargs) -> aiohttp.ClientResponse:
+        """
+        Issue a rate-limited SAM.gov request
+        Retries throttling, gateway errors and dropped connections with
+        exponential backoff (honouring Retry-After). Each attempt takes its own
+        AIMD slot, so retries after a backoff see the reduced limit.
+        The caller owns the response.
+        """
+        session = self._get_session()
+        max_retries = self.config.sam_max_retries
+        
+        for attempt in range(max_retries + 1):
+            if self._concurrency.circuit_open:
+                raise Exception(
+                    f"SAM.gov circuit breaker open after "
+                    f"{self._concurrency.consecutive_failures} consecutive failed requests"
+                )
+            
+            try:
+                async with self._concurrency:
+                    async with self._limiter:
+                        started = time.monotonic()
+                        response = await session.request(method, url, **kwargs)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                self._concurrency.record_failure(started)
+                if attempt == max_retries:
+                    self._concurrency.record_give_up()
+                    raise
+                retry_after = None
+                reason = str(e) or type(e).__name__
+            else:
+                if response.status not in SAM_RETRY_STATUSES:
+                    if response.status < 400:
+                        self._concurrency.record_success(time.monotonic() - started)
+                    return response
+                
+                self._concurrency.record_failure(started)
+                if attempt == max_retries:
+                    self._concurrency.record_give_up()
+                    return response
+                retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+                reason = f"HTTP {response.status}"
+                response.release()
+            
+            delay = retry_after if retry_after is not None else self.config.sam_retry_backoff * 2 ** attempt
+            logger.warning(
+                f"SAM.gov {reason}; retrying in {delay:.1f}s "
+                f"(attempt {attempt + 1}/{max_retries}, concurrency {self._concurrency.c_t:.1f})"
+            )
+            await asyncio.sleep(delay)
+    
+    async def search_opportunities(
         self,
         posted_from: str,
         posted_to: str,
@@ -107,94 +470,249 @@ class SAMGovClient:
         logger.info(f"Fetching opportunities: offset={offset}, limit={limit}")
         
         try:
-            response = self.session.get(
+            response = await self._request(
+                "GET",
                 self.config.sam_api_base_url,
                 params=params,
-                timeout=30
+                timeout=aiohttp.ClientTimeout(total=30)
             )
-            response.raise_for_status()
-            
-            # Rate limiting
-            time.sleep(self.config.rate_limit_delay)
+            async with response:
+                if response.status >= 400:
+                    logger.error(f"SAM.gov API error: {response.status} - {await response.text()}")
+                response.raise_for_status()
+                return orjson.loads(await response.read())
             
-            return response.json()
-            
-        except requests.exceptions.HTTPError as e:
-            logger.error(f"SAM.gov API error: {e.response.status_code} - {e.response.text}")
+        except aiohttp.ClientResponseError:
             raise
         except Exception as e:
             logger.error(f"Error fetching opportunities: {str(e)}")
             raise
     
-    def fetch_all_opportunities(self, days_back: int = 30) -> List[Dict]:
+    async def fetch_all_opportunities_async(
+        self,
+        days_back: int = 30,
+        posted_from_override: Optional[str] = None
+    ) -> List[Dict]:
         """
         Fetch all opportunities from the last N days
-        Handles pagination automatically
+        The first page reports totalRecords; remaining pages are fetched concurrently
+        
+        Args:
+            days_back: Size of the window ending today
+            posted_from_override: Start date (MM/DD/YYYY) to use instead of days_back
         """
-        end_date = datetime.now()
+        end_date = datetime.now(timezone.utc)
         start_date = end_date - timedelta(days=days_back)
         
-        posted_from = start_date.strftime("%m/%d/%Y")
-        posted_to = end_date.strftime("%m/%d/%Y")
+        posted_from = posted_from_override or _sam_date(start_date)
+        posted_to = _sam_date(end_date)
         
         logger.info(f"Fetching opportunities from {posted_from} to {posted_to}")
         
-        all_opportunities = []
-        offset = 0
         limit = 10
         
-        while True:
-            data = self.search_opportunities(posted_from, posted_to, limit, offset)
-            
-            opportunities = data.get("opportunitiesData", [])
+        data = await self.search_opportunities(posted_from, posted_to, limit, 0)
+        all_opportunities = data.get("opportunitiesData", [])
+        total_records = data.get("totalRecords", 0)
+        logger.info(f"Fetched {len(all_opportunities)} of {total_records} opportunities")
+        
+        async def fetch_page(offset: int) -> List[Dict]:
+            # In-flight pages are capped per attempt by the AIMD controller in _request
+            page = await self.search_opportunities(posted_from, posted_to, limit, offset)
+            return page.get("opportunitiesData", [])
+        
+        # gather preserves offset order, so results match the sequential pagination
+        pages = await asyncio.gather(
+            *(fetch_page(offset) for offset in range(limit, total_records, limit))
+        )
+        for opportunities in pages:
             all_opportunities.extend(opportunities)
-            
-            total_records = data.get("totalRecords", 0)
-            logger.info(f"Fetched {len(all_opportunities)} of {total_records} opportunities")
-            
-            # Check if we've fetched all records
-            if len(all_opportunities) >= total_records:
-                break
-            
-            offset += limit
         
         logger.info(f"Total opportunities fetched: {len(all_opportunities)}")
         return all_opportunities
     
-    def download_file(self, url: str, filename: str) -> bytes:
+    def fetch_all_opportunities(
+        self,
+        days_back: int = 30,
+        posted_from_override: Optional[str] = None
+    ) -> List[Dict]:
+        """Synchronous wrapper around fetch_all_opportunities_async"""
+        return self._run(self.fetch_all_opportunities_async(days_back, posted_from_override))
+    
+    @asynccontextmanager
+    async def stream_file(self, url: str, filename: str) -> AsyncIterator[Optional[aiohttp.ClientResponse]]:
+        """
+        Open a SAM.gov resource link without reading the body
+        Yields the response (consume it with response.content.iter_chunked),
+        or None if the request failed
+        """
+        # Add API key to URL
+        url_with_key = f"{url}?api_key={self.config.sam_api_key}"
+        
+        try:
+            response = await self._request(
+                "GET",
+                url_with_key,
+                # No total limit: the body may be streamed into a slow upload
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=60)
+            )
+        except Exception as e:
+            logger.error(f"Error downloading {filename}: {str(e)}")
+            response = None
+        
+        if response is not None and response.status >= 400:
+            logger.error(f"Error downloading {filename}: HTTP {response.status}")
+            response.release()
+            response = None
+        
+        if response is None:
+            yield None
+            return
+        
+        async with response:
+            yield response
+    
+    async def download_file_async(self, url: str, filename: str) -> Optional[bytes]:
         """Download a file from SAM.gov resource link"""
         try:
-            # Add API key to URL
-            url_with_key = f"{url}?api_key={self.config.sam_api_key}"
-            
-            response = self.session.get(url_with_key, timeout=60)
-            response.raise_for_status()
-            
-            time.sleep(self.config.rate_limit_delay)
+            async with self.stream_file(url, filename) as response:
+                if response is None:
+                    return None
+                content = await response.read()
             
             logger.info(f"Downloaded file: {filename}")
-            return response.content
+            return content
             
         except Exception as e:
             logger.error(f"Error downloading {filename}: {str(e)}")
             return None
+    
+    def download_file(self, url: str, filename: str) -> Optional[bytes]:
+        """Synchronous wrapper around download_file_async"""
+        return self._run(self.download_file_async(url, filename))
 
 
 # ============================================================================
 # SHAREPOINT CLIENT
 # ============================================================================
 
+# State file for the list's Graph delta query
+DELTA_STATE_NAME = "sharepoint_delta.json"
+
+# Max sub-requests per Graph $batch call
+GRAPH_BATCH_LIMIT = 20
+
+# SharePoint's size limit for a single list item attachment
+SP_ATTACHMENT_MAX_BYTES = 250 * 1024 * 1024
+
+# Read size when streaming attachments from SAM.gov to SharePoint
+ATTACHMENT_CHUNK_SIZE = 64 * 1024
+
+# Connection pooling and retries shared by the Graph and SharePoint REST clients
+SP_CONNECTION_LIMIT = 20
+SP_RETRY_STATUSES = {429, 502, 503, 504}
+SP_MAX_RETRIES = 3
+SP_RETRY_BACKOFF = 0.5  # Base delay for exponential backoff (seconds)
+
+
+def _load_token_cache(config: Config) -> SerializableTokenCache:
+    """Load the persisted MSAL token cache so unexpired tokens are reused"""
+    cache = SerializableTokenCache()
+    path = config.msal_cache_path
+    if path and os.path.exists(path):
+        try:
+            with open(path) as f:
+                cache.deserialize(f.read())
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable MSAL cache {path}: {str(e)}")
+    return cache
+
+
+def _save_token_cache(config: Config, cache: SerializableTokenCache):
+    """Persist the MSAL token cache if a new token was acquired"""
+    path = config.msal_cache_path
+    if not path or not cache.has_state_changed:
+        return
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Owner-only permissions: the cache holds bearer tokens
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(cache.serialize())
+        cache.has_state_changed = False
+    except OSError as e:
+        logger.warning(f"Could not persist MSAL cache {path}: {str(e)}")
+
+
+def build_msal_app(config: Config) -> ConfidentialClientApplication:
+    """
+    MSAL client for the app registration, backed by the persisted token cache
+    Build once per process and reuse it so warm runs skip construction
+    and keep tokens in memory
+    """
+    return ConfidentialClientApplication(
+        config.client_id,
+        authority=f"https://login.microsoftonline.com/{config.tenant_id}",
+        client_credential=config.client_secret,
+        token_cache=_load_token_cache(config),
+    )
+
+
 class SharePointClient:
     """Handles SharePoint authentication and operations"""
     
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, msal_app: Optional[ConfidentialClientApplication] = None):
         self.config = config
+        self.msal_app = msal_app
         self.access_token = None
         self.site_id = None
         self.list_id = None
         self.sharepoint_hostname = None
         self.site_relative_url = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        # Separate keep-alive pools: Graph and the tenant's SharePoint host
+        self._graph_session = self._pooled_session()
+        self._sp_rest_session = self._pooled_session()
         self._parse_site_url()
+        # SharePoint REST endpoint for adding attachments; only item_id and filename vary per call
+        self._attach_url_tmpl = (
+            f"https://{self.sharepoint_hostname}{self.site_relative_url}/"
+            f"_api/web/lists/getbytitle('{self._odata_literal(self.config.sharepoint_list_name)}')/"
+            "items({item_id})/AttachmentFiles/add(FileName='{filename}')"
+        )
+    
+    @staticmethod
+    def _pooled_session() -> requests.Session:
+        """requests.Session that reuses connections and retries throttled/transient errors"""
+        session = requests.Session()
+        retry = Retry(
+            total=SP_MAX_RETRIES,
+            backoff_factor=SP_RETRY_BACKOFF,
+            status_forcelist=sorted(SP_RETRY_STATUSES),
+            raise_on_status=False  # Hand back the last response so raise_for_status reports it
+        )
+        session.mount(
+            "https://",
+            HTTPAdapter(pool_connections=10, pool_maxsize=SP_CONNECTION_LIMIT, max_retries=retry)
+        )
+        return session
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Lazily create the aiohttp session used for async SharePoint REST calls
+        Pooled like the requests sessions; add_attachment_rest_async does its own retries
+        """
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit_per_host=SP_CONNECTION_LIMIT)
+            )
+        return self._session
+    
+    async def close(self):
+        """Close the underlying aiohttp session"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
     
     def _parse_site_url(self):
         """Parse SharePoint site URL into components"""
@@ -208,21 +726,19 @@ class SharePointClient:
     
     def authenticate(self):
         """Acquire access token using client credentials"""
-        authority = f"https://login.microsoftonline.com/{self.config.tenant_id}"
-        app = ConfidentialClientApplication(
-            self.config.client_id,
-            authority=authority,
-            client_credential=self.config.client_secret,
-        )
+        app = self.msal_app or build_msal_app(self.config)
+        cache = app.token_cache
         
         # Get token for Graph API
+        # (msal >= 1.23 serves client-credential tokens from the cache until they expire)
         result = app.acquire_token_for_client(
             scopes=["https://graph.microsoft.com/.default"]
         )
+        _save_token_cache(self.config, cache)
         
         if "access_token" in result:
             self.access_token = result["access_token"]
-            logger.info("✓ Graph API authentication successful")
+            logger.info(f"✓ Graph API authentication successful (source: {result.get('token_source')})")
         else:
             raise Exception(f"Authentication failed: {result.get('error_description')}")
         
@@ -230,15 +746,16 @@ class SharePointClient:
         sp_result = app.acquire_token_for_client(
             scopes=[f"https://{self.sharepoint_hostname}/.default"]
         )
+        _save_token_cache(self.config, cache)
         
         if "access_token" in sp_result:
             self.sp_rest_token = sp_result["access_token"]
-            logger.info("✓ SharePoint REST API authentication successful")
+            logger.info(f"✓ SharePoint REST API authentication successful (source: {sp_result.get('token_source')})")
         else:
             raise Exception(f"SP REST auth failed: {sp_result.get('error_description')}")
     
     def _graph_headers(self) -> Dict[str, str]:
-        """Headers for Graph API requests"""
+        """Headers for Graph API requests (bodies are pre-serialized with orjson)"""
         return {
             "Authorization": f"Bearer {self.access_token}",
             "Content-Type": "application/json",
@@ -259,10 +776,10 @@ class SharePointClient:
             return self.site_id
         
         url = f"https://graph.microsoft.com/v1.0/sites/{self.sharepoint_hostname}:{self.site_relative_url}"
-        response = requests.get(url, headers=self._graph_headers())
+        response = self._graph_session.get(url, headers=self._graph_headers())
         response.raise_for_status()
         
-        self.site_id = response.json()["id"]
+        self.site_id = orjson.loads(response.content)["id"]
         logger.info(f"✓ Site ID: {self.site_id}")
         return self.site_id
     
@@ -273,10 +790,10 @@ class SharePointClient:
         
         site_id = self.get_site_id()
         url = f"https://graph.microsoft.com/v1.0/sites/{site_id}/lists"
-        response = requests.get(url, headers=self._graph_headers())
+        response = self._graph_session.get(url, headers=self._graph_headers())
         response.raise_for_status()
         
-        lists = response.json().get("value", [])
+        lists = orjson.loads(response.content).get("value", [])
         for lst in lists:
             if lst["displayName"] == self.config.sharepoint_list_name:
                 self.list_id = lst["id"]
@@ -285,6 +802,76 @@ class SharePointClient:
         
         raise Exception(f"List '{self.config.sharepoint_list_name}' not found")
 
+    def _load_delta_state(self) -> Tuple[Optional[str], Dict[str, str]]:
+        """Load the stored deltaLink and item ID -> NoticeId map from the last run"""
+        state = _load_state(self.config, DELTA_STATE_NAME) or {}
+        delta_link = state.get("delta_link")
+        if not delta_link:
+            # Without a deltaLink the cached map can't be brought up to date
+            return None, {}
+        return delta_link, state.get("items", {})
+
+    def _save_delta_state(self, delta_link: Optional[str], items: Dict[str, str]):
+        """Store the deltaLink and item map for the next run"""
+        _save_state(self.config, DELTA_STATE_NAME, {"delta_link": delta_link, "items": items})
+
+    def _apply_delta(self, url: str, items: Dict[str, str]) -> Optional[str]:
+        """
+        Follow a delta query through all pages, applying changes to items
+        Returns the @odata.deltaLink for the next run
+        """
+        delta_link = None
+        while url:
+            response = self._graph_session.get(url, headers=self._graph_headers())
+            response.raise_for_status()
+            data = orjson.loads(response.content)
+            
+            for item in data.get("value", []):
+                notice_id = item.get("fields", {}).get("NoticeId")
+                if "deleted" in item or "@removed" in item or not notice_id:
+                    items.pop(item["id"], None)
+                else:
+                    items[item["id"]] = notice_id
+            
+            url = data.get("@odata.nextLink")
+            delta_link = data.get("@odata.deltaLink", delta_link)
+        return delta_link
+
+    def get_existing_notice_ids(self) -> Set[str]:
+        """
+        Get the NoticeIds of all items in the list
+        Uses a Graph delta query, so after the first run only items changed
+        since the stored deltaLink are downloaded
+        """
+        site_id = self.get_site_id()
+        list_id = self.get_list_id()
+        
+        full_url = (
+            f"https://graph.microsoft.com/v1.0/sites/{site_id}/lists/{list_id}/items/delta"
+            f"?$expand=fields($select=NoticeId)"
+        )
+        delta_link, items = self._load_delta_state()
+        
+        try:
+            new_delta_link = self._apply_delta(delta_link or full_url, items)
+        except requests.exceptions.HTTPError as e:
+            # 410 Gone: the delta token expired, start over with a full enumeration
+            if not delta_link or e.response is None or e.response.status_code != 410:
+                raise
+            logger.warning("Delta token expired, re-reading the full list")
+            items = {}
+            new_delta_link = self._apply_delta(full_url, items)
+        
+        self._save_delta_state(new_delta_link, items)
+        
+        notice_ids = set(items.values())
+        logger.info(f"✓ Found {len(notice_ids)} existing NoticeIds")
+        return notice_ids
+
+    async def get_existing_notice_ids_async(self) -> Set[str]:
+        """Run get_existing_notice_ids in a worker thread so the event loop stays free"""
+        return await asyncio.to_thread(self.get_existing_notice_ids)
+
     def notice_id_exists(self, notice_id: str) -> bool:
         """
         Check if a specific NoticeId exists (more efficient for single checks)
@@ -298,9 +885,9 @@ class SharePointClient:
         url = f"https://graph.microsoft.com/v1.0/sites/{site_id}/lists/{list_id}/items?expand=fields&$top=1&$filter={filter_query}"
         
         try:
-            response = requests.get(url, headers=self._graph_headers())
+            response = self._graph_session.get(url, headers=self._graph_headers())
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
             
             # If any results returned, it exists
             return len(data.get("value", [])) > 0
@@ -315,43 +902,271 @@ class SharePointClient:
         url = f"https://graph.microsoft.com/v1.0/sites/{site_id}/lists/{list_id}/items"
         payload = {"fields": fields}
         
-        response = requests.post(url, headers=self._graph_headers(), json=payload)
+        response = self._graph_session.post(url, headers=self._graph_headers(), data=orjson.dumps(payload))
         response.raise_for_status()
         
-        return response.json()
+        return orjson.loads(response.content)
     
-    def add_attachment_rest(self, item_id: str, filename: str, file_content: bytes) -> bool:
+    def create_list_items_batch(self, list_of_fields: List[Dict], max_retries: int = 3) -> List[Optional[Dict]]:
         """
-        Add attachment to list item using SharePoint REST API
-        Graph API does not support list item attachments, must use REST API
+        Create up to GRAPH_BATCH_LIMIT list items with a single Graph $batch request
+        Throttled (429) sub-requests are resent after their Retry-After delay.
+        Returns the created item for each input, in order (None if it failed)
         """
-        # SharePoint REST endpoint for adding attachments
-        url = (
-            f"https://{self.sharepoint_hostname}{self.site_relative_url}/"
-            f"_api/web/lists/getbytitle('{self.config.sharepoint_list_name}')/"
-            f"items({item_id})/AttachmentFiles/add(FileName='{filename}')"
-        )
+        if len(list_of_fields) > GRAPH_BATCH_LIMIT:
+            raise ValueError(f"At most {GRAPH_BATCH_LIMIT} items per batch")
+        
+        site_id = self.get_site_id()
+        list_id = self.get_list_id()
+        
+        results: List[Optional[Dict]] = [None] * len(list_of_fields)
+        pending = list(range(len(list_of_fields)))
+        
+        for attempt in range(max_retries + 1):
+            payload = {
+                "requests": [
+                    {
+                        "id": str(i),
+                        "method": "POST",
+                        "url": f"/sites/{site_id}/lists/{list_id}/items",
+                        "body": {"fields": list_of_fields[i]},
+                        "headers": {"Content-Type": "application/json"}
+                    }
+                    for i in pending
+                ]
+            }
+            response = self._graph_session.post(
+                "https://graph.microsoft.com/v1.0/$batch",
+                headers=self._graph_headers(),
+                data=orjson.dumps(payload)
+            )
+            response.raise_for_status()
+            
+            throttled = []
+            retry_after = 0.0
+            for sub in orjson.loads(response.content).get("responses", []):
+                idx = int(sub["id"])
+                status = sub.get("status", 500)
+                if 200 <= status < 300:
+                    results[idx] = sub.get("body")
+                elif status == 429 and attempt < max_retries:
+                    throttled.append(idx)
+                    sub_retry_after = _parse_retry_after((sub.get("headers") or {}).get("Retry-After"))
+                    retry_after = max(retry_after, sub_retry_after if sub_retry_after is not None else 2 ** attempt)
+                else:
+                    error = (sub.get("body") or {}).get("error", {})
+                    logger.error(f"Batch create failed for item {idx}: {status} - {error.get('message')}")
+            
+            if not throttled:
+                break
+            logger.warning(f"{len(throttled)} batch items throttled, retrying in {retry_after:.1f}s")
+            time.sleep(retry_after)
+            pending = throttled
         
-        headers = {
+        return results
+    
+    @staticmethod
+    def _odata_literal(value: str) -> str:
+        """Escape a value for use inside a quoted OData string in a URL path"""
+        # Quotes are doubled per OData; percent-encoding covers spaces, '#', '/', Unicode etc.
+        return quote(value.replace("'", "''"), safe="")
+    
+    def _attachment_url(self, item_id: str, filename: str) -> str:
+        """SharePoint REST endpoint for adding an attachment to an item"""
+        return self._attach_url_tmpl.format(item_id=item_id, filename=self._odata_literal(filename))
+    
+    def _attachment_headers(self) -> Dict[str, str]:
+        """Headers for SharePoint REST attachment uploads"""
+        return {
             "Authorization": f"Bearer {self.sp_rest_token}",
             "Accept": "application/json;odata=verbose",
             "Content-Type": "application/octet-stream"
         }
+    
+    def add_attachment_rest(self, item_id: str, filename: str, file_content: bytes) -> bool:
+        """
+        Add attachment to list item using SharePoint REST API
+        Graph API does not support list item attachments, must use REST API
+        """
+        url = self._attachment_url(item_id, filename)
         
         try:
-            response = requests.post(url, headers=headers, data=file_content)
+            response = self._sp_rest_session.post(url, headers=self._attachment_headers(), data=file_content)
             response.raise_for_status()
             logger.info(f"✓ Attached file: {filename}")
             return True
         except Exception as e:
             logger.error(f"Failed to attach {filename}: {str(e)}")
             return False
-
+    
+    @staticmethod
+    @asynccontextmanager
+    async def _attachment_body(file_content) -> AsyncIterator[Optional[Union[bytes, AsyncIterable[bytes]]]]:
+        """Open one attempt's request body for add_attachment_rest_async"""
+        if isinstance(file_content, (bytes, bytearray)):
+            yield file_content
+        else:
+            async with file_content() as body:
+                yield body
+    
+    async def add_attachment_rest_async(
+        self,
+        item_id: str,
+        filename: str,
+        file_content: Union[bytes, Callable[[], AsyncContextManager[Optional[AsyncIterable[bytes]]]]]
+    ) -> bool:
+        """
+        Async variant of add_attachment_rest
+        file_content may instead be a callable returning an async context manager
+        that yields the body as an async iterable of chunks (or None to give up).
+        The chunks are sent with chunked transfer encoding without buffering the
+        whole file, and the stream is reopened for each retry
+        """
+        url = self._attachment_url(item_id, filename)
+        session = self._get_session()
+        
+        for attempt in range(SP_MAX_RETRIES + 1):
+            try:
+                async with self._attachment_body(file_content) as body:
+                    if body is None:
+                        return False
+                    async with session.post(
+                        url,
+                        headers=self._attachment_headers(),
+                        data=body,
+                        timeout=aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=300)
+                    ) as response:
+                        if response.status not in SP_RETRY_STATUSES or attempt == SP_MAX_RETRIES:
+                            response.raise_for_status()
+                            logger.info(f"✓ Attached file: {filename}")
+                            return True
+                        retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+                        reason = f"HTTP {response.status}"
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt == SP_MAX_RETRIES:
+                    logger.error(f"Failed to attach {filename}: {str(e) or type(e).__name__}")
+                    return False
+                retry_after = None
+                reason = str(e) or type(e).__name__
+            except Exception as e:
+                logger.error(f"Failed to attach {filename}: {str(e)}")
+                return False
+            
+            delay = retry_after if retry_after is not None else SP_RETRY_BACKOFF * 2 ** attempt
+            logger.warning(
+                f"SharePoint {reason} attaching {filename}; retrying in {delay:.1f}s "
+                f"(attempt {attempt + 1}/{SP_MAX_RETRIES})"
+            )
+            await asyncio.sleep(delay)
 
 # ============================================================================
 # DATA TRANSFORMATION
 # ============================================================================
 
+def _format_date(date_str: Optional[str]) -> Optional[str]:
+    """Convert date string to ISO format for SharePoint"""
+    # Checked before the cache, which can't hash lists or dicts
+    if not date_str or not isinstance(date_str, str):
+        return None
+    return _format_date_str(date_str)
+
+
+@functools.lru_cache(maxsize=4096)
+def _format_date_str(date_str: str) -> str:
+    """
+    Cached part of _format_date
+    The same posted/deadline/award dates recur across a batch
+    """
+    # SAM.gov returns dates like "2025-12-31" or "2026-01-26T16:00:00-05:00"
+    if "T" in date_str:
+        try:
+            # Validates and normalizes the timestamp ("Z" isn't accepted before Python 3.11)
+            iso = date_str[:-1] + "+00:00" if date_str.endswith("Z") else date_str
+            return datetime.fromisoformat(iso).isoformat()
+        except ValueError:
+            # Pass anything we can't parse through unchanged, as before
+            return date_str
+    
+    # Add time component
+    return f"{date_str}T00:00:00Z"
+
+
+# (SharePoint field, SAM.gov key) pairs copied as-is from the opportunity
+FIELD_SPECS = (
+    ("Title", "title"),
+    ("NoticeId", "noticeId"),
+    ("SolicitationNumber", "solicitationNumber"),
+    ("FullParentPath", "fullParentPathName"),
+    ("FullParentCode", "fullParentPathCode"),
+    ("Type", "type"),
+    ("BaseType", "baseType"),
+    ("SetAsideCode", "typeOfSetAside"),
+    ("NAICSCode", "naicsCode"),
+    ("ClassificationCode", "classificationCode"),
+    ("Active", "active"),
+    ("OrganizationType", "organizationType"),
+    ("AdditionalInfoLink", "additionalInfoLink"),
+    ("UILink", "uiLink"),
+    ("DescriptionLink", "description"),
+)
+
+# Opportunity dates, normalized with _format_date
+DATE_FIELD_SPECS = (
+    ("PostedDate", "postedDate"),
+    ("ResponseDeadline", "responseDeadLine"),
+)
+
+# Components of fullParentPathName, in parse_department_info order
+DEPARTMENT_FIELDS = ("Department", "Subtier", "Office")
+
+# Read from the primary point of contact
+POC_FIELD_SPECS = (
+    ("POC_Name", "fullName"),
+    ("POC_Email", "email"),
+    ("POC_Phone", "phone"),
+    ("POC_Title", "title"),
+)
+
+# Read from placeOfPerformance; each value is an object with a "name"
+POP_FIELD_SPECS = (
+    ("PoP_City", "city"),
+    ("PoP_State", "state"),
+    ("PoP_Country", "country"),
+)
+
+# Read from award and award.awardee
+AWARD_FIELD_SPECS = (
+    ("AwardNumber", "number"),
+    ("AwardAmount", "amount"),
+)
+AWARDEE_FIELD_SPECS = (
+    ("AwardeeName", "name"),
+    ("AwardeeLocation", "location"),
+)
+
+
+def _copy_fields(fields: Dict, source: Dict, specs: Tuple[Tuple[str, str], ...]):
+    """Copy the non-None source[key] values into fields[name]"""
+    get = source.get
+    for name, key in specs:
+        value = get(key)
+        if value is not None:
+            fields[name] = value
+
+
+def _nested(value, key: str):
+    """value[key] if value is a dict, else None"""
+    return value.get(key) if isinstance(value, dict) else None
+
+
+def _primary_poc(opp: Dict) -> Dict:
+    """Primary point of contact (falling back to the first listed)"""
+    poc_list = opp.get("pointOfContact")
+    if not poc_list:
+        return {}
+    return next((p for p in poc_list if p.get("type") == "primary"), poc_list[0])
+
+
 class OpportunityTransformer:
     """Transforms SAM.gov opportunity data to SharePoint format"""
     
@@ -376,122 +1191,71 @@ class OpportunityTransformer:
     @staticmethod
     def format_date(date_str: str) -> Optional[str]:
         """Convert date string to ISO format for SharePoint"""
-        if not date_str:
-            return None
-        
-        try:
-            # SAM.gov returns dates like "2025-12-31" or "2026-01-26T16:00:00-05:00"
-            if "T" in date_str:
-                # Already ISO format
-                return date_str
-            else:
-                # Add time component
-                return f"{date_str}T00:00:00Z"
-        except:
-            return None
-    
-    @staticmethod
-    def get_poc_info(poc_list: List[Dict]) -> Dict:
-        """Extract primary point of contact information"""
-        if not poc_list:
-            return {}
-        
-        # Find primary contact
-        primary = next((p for p in poc_list if p.get("type") == "primary"), poc_list[0])
-        
-        return {
-            "POC_Name": primary.get("fullName"),
-            "POC_Email": primary.get("email"),
-            "POC_Phone": primary.get("phone"),
-            "POC_Title": primary.get("title")
-        }
-    
-    @staticmethod
-    def get_place_of_performance(pop: Dict) -> Dict:
-        """Extract place of performance information"""
-        if not pop:
-            return {}
-        
-        city = pop.get("city", {})
-        state = pop.get("state", {})
-        country = pop.get("country", {})
-        
-        return {
-            "PoP_City": city.get("name") if isinstance(city, dict) else None,
-            "PoP_State": state.get("name") if isinstance(state, dict) else None,
-            "PoP_Country": country.get("name") if isinstance(country, dict) else None
-        }
-    
-    @staticmethod
-    def get_award_info(award: Dict) -> Dict:
-        """Extract award information if available"""
-        if not award:
-            return {}
-        
-        awardee = award.get("awardee", {})
-        
-        return {
-            "AwardNumber": award.get("number"),
-            "AwardAmount": award.get("amount"),
-            "AwardDate": OpportunityTransformer.format_date(award.get("date")),
-            "AwardeeName": awardee.get("name") if isinstance(awardee, dict) else None,
-            "AwardeeLocation": awardee.get("location") if isinstance(awardee, dict) else None
-        }
+        return _format_date(date_str)
     
     @staticmethod
     def transform(opp: Dict) -> Dict:
         """Transform SAM.gov opportunity to SharePoint fields"""
-        department, subtier, office = OpportunityTransformer.parse_department_info(
-            opp.get("fullParentPathName")
-        )
+        # Single pass: each value is written straight into the result, skipping None values
+        fields = {}
+        _copy_fields(fields, opp, FIELD_SPECS)
+        
+        for name, key in DATE_FIELD_SPECS:
+            value = _format_date(opp.get(key))
+            if value is not None:
+                fields[name] = value
         
-        # Get set-aside description
+        # Unknown codes fall back to the code itself
         set_aside_code = opp.get("typeOfSetAside")
-        set_aside_desc = SETASIDE_CODES.get(set_aside_code, set_aside_code) if set_aside_code else None
-        
-        # Build base fields
-        fields = {
-            "Title": opp.get("title"),
-            "NoticeId": opp.get("noticeId"),
-            "SolicitationNumber": opp.get("solicitationNumber"),
-            "Department": department,
-            "Subtier": subtier,
-            "Office": office,
-            "FullParentPath": opp.get("fullParentPathName"),
-            "FullParentCode": opp.get("fullParentPathCode"),
-            "PostedDate": OpportunityTransformer.format_date(opp.get("postedDate")),
-            "ResponseDeadline": OpportunityTransformer.format_date(opp.get("responseDeadLine")),
-            "Type": opp.get("type"),
-            "BaseType": opp.get("baseType"),
-            "SetAsideCode": set_aside_code,
-            "SetAsideDescription": set_aside_desc,
-            "NAICSCode": opp.get("naicsCode"),
-            "ClassificationCode": opp.get("classificationCode"),
-            "Active": opp.get("active"),
-            "OrganizationType": opp.get("organizationType"),
-            "AdditionalInfoLink": opp.get("additionalInfoLink"),
-            "UILink": opp.get("uiLink"),
-            "DescriptionLink": opp.get("description")
-        }
+        if set_aside_code:
+            fields["SetAsideDescription"] = SETASIDE_CODES.get(set_aside_code) or set_aside_code
         
-        # Add POC info
-        poc_info = OpportunityTransformer.get_poc_info(opp.get("pointOfContact", []))
-        fields.update(poc_info)
+        department_info = OpportunityTransformer.parse_department_info(opp.get("fullParentPathName"))
+        for name, value in zip(DEPARTMENT_FIELDS, department_info):
+            if value is not None:
+                fields[name] = value
         
-        # Add place of performance
-        pop_info = OpportunityTransformer.get_place_of_performance(opp.get("placeOfPerformance"))
-        fields.update(pop_info)
+        # The primary contact is looked up once and shared by all POC fields
+        _copy_fields(fields, _primary_poc(opp), POC_FIELD_SPECS)
         
-        # Add award info if available
-        award_info = OpportunityTransformer.get_award_info(opp.get("award"))
-        fields.update(award_info)
+        pop = opp.get("placeOfPerformance")
+        if pop:
+            for name, key in POP_FIELD_SPECS:
+                value = _nested(pop.get(key), "name")
+                if value is not None:
+                    fields[name] = value
         
-        # Remove None values
-        fields = {k: v for k, v in fields.items() if v is not None}
+        award = opp.get("award")
+        if award:
+            _copy_fields(fields, award, AWARD_FIELD_SPECS)
+            award_date = _format_date(award.get("date"))
+            if award_date is not None:
+                fields["AwardDate"] = award_date
+            awardee = award.get("awardee", {})
+            if isinstance(awardee, dict):
+                _copy_fields(fields, awardee, AWARDEE_FIELD_SPECS)
         
         return fields
 
 
+# Opportunities per unit of transform work handed to an executor
+TRANSFORM_CHUNK_SIZE = 200
+
+
+def _transform_chunk(chunk: List[Dict]) -> List[Tuple[Optional[Dict], Optional[str]]]:
+    """
+    Transform a chunk of opportunities, returning (fields, error) per opportunity
+    Runs in a worker process, so errors come back as strings
+    """
+    results = []
+    for opp in chunk:
+        try:
+            results.append((OpportunityTransformer.transform(opp), None))
+        except Exception as e:
+            results.append((None, str(e)))
+    return results
+
+
 # ============================================================================
 # MAIN SYNC ORCHESTRATOR
 # ============================================================================
@@ -499,105 +1263,229 @@ class OpportunityTransformer:
 class SyncOrchestrator:
     """Orchestrates the sync between SAM.gov and SharePoint"""
     
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, msal_app: Optional[ConfidentialClientApplication] = None):
         self.config = config
         self.sam_client = SAMGovClient(config)
-        self.sp_client = SharePointClient(config)
+        self.sp_client = SharePointClient(config, msal_app)
+        self.cursor_store = CursorStore(config)
+    
+    def _posted_from(self, now: datetime) -> Optional[str]:
+        """
+        Start of the SAM.gov window: sync_overlap_days before the last
+        successful sync, but never further back than days_to_sync
+        Already-synced notices in the overlap are skipped by NoticeId
+        """
+        cursor = self.cursor_store.get()
+        if cursor is None:
+            return None
+        if cursor.tzinfo is None:
+            cursor = cursor.replace(tzinfo=timezone.utc)
+        
+        start = max(
+            cursor - timedelta(days=self.config.sync_overlap_days),
+            now - timedelta(days=self.config.days_to_sync)
+        )
+        return _sam_date(start)
+    
+    @asynccontextmanager
+    async def _open_attachment(self, link: str, filename: str) -> AsyncIterator[Optional[AsyncIterable[bytes]]]:
+        """Stream a resource link from SAM.gov, or yield None if it can't be attached"""
+        async with self.sam_client.stream_file(link, filename) as response:
+            if response is None:
+                yield None
+                return
+            if response.content_length and response.content_length > SP_ATTACHMENT_MAX_BYTES:
+                logger.warning(
+                    f"Skipping {filename}: {response.content_length} bytes exceeds "
+                    f"SharePoint's attachment size limit"
+                )
+                yield None
+                return
+            yield response.content.iter_chunked(ATTACHMENT_CHUNK_SIZE)
+    
+    async def _transfer_attachment(self, item_id: str, link: str, filename: str, upload_slots: asyncio.Semaphore):
+        """Stream one resource link from SAM.gov straight into a SharePoint attachment"""
+        # Take the upload slot first so no download sits open waiting for one
+        async with upload_slots:
+            await self.sp_client.add_attachment_rest_async(
+                item_id, filename, functools.partial(self._open_attachment, link, filename)
+            )
+    
+    async def _attach_files(self, opp: Dict, item_id: str, upload_slots: asyncio.Semaphore):
+        """Transfer all of an opportunity's resource links to the list item concurrently"""
+        notice_id = opp.get("noticeId")
+        await asyncio.gather(*(
+            self._transfer_attachment(item_id, link, f"{notice_id}_attachment_{idx+1}.pdf", upload_slots)
+            for idx, link in enumerate(opp.get("resourceLinks") or [])
+        ))
+    
+    async def _transform_all(
+        self,
+        opportunities: List[Dict]
+    ) -> AsyncIterator[Tuple[Dict, Optional[Dict], Optional[str]]]:
+        """
+        Transform opportunities off the event loop, yielding
+        (opportunity, fields, error) as each chunk finishes
+        Several chunks are spread over a process pool; a single chunk runs in a thread
+        """
+        chunks = [
+            opportunities[start:start + TRANSFORM_CHUNK_SIZE]
+            for start in range(0, len(opportunities), TRANSFORM_CHUNK_SIZE)
+        ]
+        workers = min(self.config.transform_workers or os.cpu_count() or 1, len(chunks))
+        # spawn rather than fork: this process already runs threads and open sockets
+        pool = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        ) if workers > 1 else None
+        loop = asyncio.get_running_loop()
+        
+        async def run(chunk: List[Dict]):
+            return chunk, await loop.run_in_executor(pool, _transform_chunk, chunk)
+        
+        try:
+            for next_chunk in asyncio.as_completed([run(chunk) for chunk in chunks]):
+                chunk, results = await next_chunk
+                for opp, (fields, error) in zip(chunk, results):
+                    yield opp, fields, error
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+    
+    async def _load_existing_ids(self) -> Set[str]:
+        """Authenticate to SharePoint and read the NoticeIds already in the list"""
+        await asyncio.to_thread(self.sp_client.authenticate)
+        return await self.sp_client.get_existing_notice_ids_async()
     
     def sync(self, download_attachments: bool = True):
         """Run the sync process"""
+        asyncio.run(self.sync_async(download_attachments))
+    
+    async def sync_async(self, download_attachments: bool = True):
+        """Run the sync process, closing both HTTP sessions when done"""
+        try:
+            await self._sync(download_attachments)
+        finally:
+            await self.sam_client.close()
+            await self.sp_client.close()
+    
+    async def _sync(self, download_attachments: bool):
         logger.info("=== Starting SAM.gov to SharePoint Sync ===")
+        sync_started = datetime.now(timezone.utc)
         
-        # Authenticate
-        self.sp_client.authenticate()
+        # The cursor may live in Blob Storage, so read it off the event loop
+        posted_from = await asyncio.to_thread(self._posted_from, sync_started)
         
-        # Get existing opportunities
-        
-        # Fetch opportunities from SAM.gov
-        opportunities = self.sam_client.fetch_all_opportunities(
-            days_back=self.config.days_to_sync
-        )
+        # Authenticate and get existing opportunities while fetching from SAM.gov;
+        # the two hit different hosts and don't depend on each other
+        existing_task = asyncio.create_task(self._load_existing_ids())
+        opps_task = asyncio.create_task(self.sam_client.fetch_all_opportunities_async(
+            days_back=self.config.days_to_sync,
+            posted_from_override=posted_from
+        ))
+        try:
+            existing_ids, opportunities = await asyncio.gather(existing_task, opps_task)
+        except BaseException:
+            existing_task.cancel()
+            opps_task.cancel()
+            raise
         
         # Process each opportunity
         new_count = 0
-        skipped_count = 0
         error_count = 0
         
-        for opp in opportunities:
-            notice_id = opp.get("noticeId")
-            
-            # Skip if already exists
-            already_exists = self.sp_client.notice_id_exists(notice_id)
-            if already_exists:
-                skipped_count += 1
-                logger.debug(f"Skipping existing: {notice_id}")
-                continue
-            
+        # Keying by noticeId also drops duplicates SAM.gov returns across pages
+        by_id = {opp["noticeId"]: opp for opp in opportunities if opp.get("noticeId")}
+        if len(by_id) < len(opportunities):
+            logger.info(f"Dropped {len(opportunities) - len(by_id)} duplicate or ID-less opportunities")
+        
+        # Skip existing opportunities, keeping SAM.gov's order
+        pending = [opp for notice_id, opp in by_id.items() if notice_id not in existing_ids]
+        skipped_count = len(opportunities) - len(pending)
+        
+        # Create list items in Graph $batch chunks as transformed opportunities
+        # arrive; each created item's attachments transfer in the background
+        upload_slots = asyncio.Semaphore(self.config.sharepoint_upload_concurrency)
+        attach_tasks = []  # (notice_id, task) pairs
+        
+        async def create_batch(batch: List[Tuple[Dict, Dict]]):
+            nonlocal new_count, error_count
             try:
-                # Transform data
-                fields = OpportunityTransformer.transform(opp)
+                items = await asyncio.to_thread(
+                    self.sp_client.create_list_items_batch, [fields for _, fields in batch]
+                )
+            except Exception as e:
+                error_count += len(batch)
+                logger.error(f"Error creating batch of {len(batch)} items: {str(e)}")
+                return
+            
+            for (opp, _), item in zip(batch, items):
+                if item is None:
+                    error_count += 1
+                    continue
                 
-                # Create list item
-                item = self.sp_client.create_list_item(fields)
                 item_id = item["id"]
                 logger.info(f"✓ Created: {opp.get('title')[:50]}... (ID: {item_id})")
                 
                 # Download and attach files
                 if download_attachments:
-                    resource_links = opp.get("resourceLinks", [])
-                    for idx, link in enumerate(resource_links):
-                        filename = f"{notice_id}_attachment_{idx+1}.pdf"
-                        file_content = self.sam_client.download_file(link, filename)
-                        
-                        if file_content:
-                            self.sp_client.add_attachment_rest(item_id, filename, file_content)
-                
-                new_count += 1
-                
-            except Exception as e:
+                    task = asyncio.create_task(self._attach_files(opp, item_id, upload_slots))
+                    attach_tasks.append((opp.get("noticeId"), task))
+                else:
+                    new_count += 1
+        
+        batch = []  # (opportunity, fields) pairs
+        async for opp, fields, error in self._transform_all(pending):
+            if error is not None:
+                error_count += 1
+                logger.error(f"Error processing {opp.get('noticeId')}: {error}")
+                continue
+            
+            batch.append((opp, fields))
+            if len(batch) == GRAPH_BATCH_LIMIT:
+                await create_batch(batch)
+                batch = []
+        if batch:
+            await create_batch(batch)
+        
+        results = await asyncio.gather(*(task for _, task in attach_tasks), return_exceptions=True)
+        for (notice_id, _), result in zip(attach_tasks, results):
+            if isinstance(result, Exception):
                 error_count += 1
-                logger.error(f"Error processing {notice_id}: {str(e)}")
+                logger.error(f"Error processing {notice_id}: {str(result)}")
+            else:
+                new_count += 1
         
         # Summary
         logger.info("=== Sync Complete ===")
         logger.info(f"New opportunities created: {new_count}")
-        logger.info(f"Skipped (already exists): {skipped_count}")
+        logger.info(f"Skipped (already exists or duplicate): {skipped_count}")
         logger.info(f"Errors: {error_count}")
         logger.info(f"Total processed: {len(opportunities)}")
+        
+        # Only advance the cursor after a clean run, so failed items are retried
+        if error_count == 0:
+            await asyncio.to_thread(self.cursor_store.set, sync_started)
 
 
 # ============================================================================
 # MAIN ENTRY POINT
 # ============================================================================
 
-def main():
-    """Main execution function"""
-    
-    # Load configuration from environment variables
-    config = Config(
-        sam_api_key=os.getenv("SAM_API_KEY"),
-        tenant_id=os.getenv("AZURE_TENANT_ID"),
-        client_id=os.getenv("AZURE_CLIENT_ID"),
-        client_secret=os.getenv("AZURE_CLIENT_SECRET"),
-        sharepoint_site_url=os.getenv("SHAREPOINT_SITE_URL"),
-        sharepoint_list_name=os.getenv("SHAREPOINT_LIST_NAME", "SAM Opportunities"),
-        days_to_sync=int(os.getenv("DAYS_TO_SYNC", "30"))
-    )
-    
-    # Validate required config
-    required_fields = [
-        config.sam_api_key,
-        config.tenant_id,
-        config.client_id,
-        config.client_secret,
-        config.sharepoint_site_url
-    ]
+def main(
+    config: Optional[Config] = None,
+    msal_app: Optional[ConfidentialClientApplication] = None
+):
+    """
+    Main execution function
+    Long-lived hosts pass a Config and MSAL app built once per process
+    """
     
-    if not all(required_fields):
-        raise ValueError("Missing required configuration. Check environment variables.")
+    # Load configuration from environment variables (validated by Config)
+    if config is None:
+        config = config_from_env()
     
     # Run sync
-    orchestrator = SyncOrchestrator(config)
+    orchestrator = SyncOrchestrator(config, msal_app)
     orchestrator.sync(download_attachments=True)
 
 # if __name__ == "__main__":
@@ -0,0 +1,38 @@
+import orjson
+import requests
+
+
+class FakeResponse:
+    """Just enough of requests.Response for SharePointClient"""
+
+    def __init__(self, status_code: int = 200, body=None):
+        self.status_code = status_code
+        self.content = orjson.dumps(body if body is not None else {})
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error", response=self)
+
+
+class FakeSession:
+    """
+    Stands in for a pooled requests.Session
+    Maps each URL to a list of responses served in order, and records calls
+    """
+
+    def __init__(self, routes=None):
+        self.routes = {url: list(responses) for url, responses in (routes or {}).items()}
+        self.calls = []
+
+    def _respond(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        responses = self.routes.get(url)
+        if not responses:
+            raise AssertionError(f"Unexpected {method} {url}")
+        return responses.pop(0)
+
+    def get(self, url, **kwargs):
+        return self._respond("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self._respond("POST", url, **kwargs)
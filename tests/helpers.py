@@ -0,0 +1,16 @@
+from sharepoint_integration.sharepoint_sam import Config
+
+
+def make_config(**kwargs) -> Config:
+    """Config with placeholder credentials and no persisted state"""
+    settings = dict(msal_cache_path=None, state_dir=None)
+    settings.update(kwargs)
+    return Config(
+        sam_api_key="key",
+        tenant_id="tenant",
+        client_id="client",
+        client_secret="secret",
+        sharepoint_site_url="https://tenant.sharepoint.com/sites/site",
+        sharepoint_list_name="SAM Opportunities",
+        **settings
+    )
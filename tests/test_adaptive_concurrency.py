@@ -0,0 +1,225 @@
+import asyncio
+import time
+import unittest
+
+from aiohttp import web
+
+from sharepoint_integration.sharepoint_sam import AdaptiveConcurrency, SAMGovClient
+from tests.helpers import make_config
+
+
+def make_controller(**kwargs) -> AdaptiveConcurrency:
+    settings = dict(initial=4, c_min=1, c_max=8, target_latency=1.0, break_after=3)
+    settings.update(kwargs)
+    return AdaptiveConcurrency(**settings)
+
+
+class AdaptiveConcurrencyTest(unittest.TestCase):
+    def test_initial_limit_is_clamped(self):
+        self.assertEqual(make_controller(initial=50).c_t, 8)
+        self.assertEqual(make_controller(initial=0).c_t, 1)
+
+    def test_fast_responses_grow_the_limit_additively(self):
+        controller = make_controller()
+        controller.record_success(0.1)
+        controller.record_success(0.1)
+        self.assertEqual(controller.c_t, 5.0)
+
+    def test_growth_stops_at_c_max(self):
+        controller = make_controller()
+        for _ in range(100):
+            controller.record_success(0.1)
+        self.assertEqual(controller.c_t, 8)
+
+    def test_slow_responses_hold_the_limit(self):
+        controller = make_controller()
+        controller.record_success(5.0)
+        self.assertEqual(controller.c_t, 4)
+
+    def test_failures_halve_the_limit_down_to_c_min(self):
+        controller = make_controller(break_after=100)
+        controller.record_failure()
+        self.assertEqual(controller.c_t, 2)
+        for _ in range(10):
+            controller.record_failure()
+        self.assertEqual(controller.c_t, 1)
+
+    def test_one_cut_per_congestion_event(self):
+        controller = make_controller(initial=8)
+        sent_at = time.monotonic()
+        # Every request in flight when the burst hit reports the same event
+        for _ in range(8):
+            controller.record_failure(sent_at)
+        self.assertEqual(controller.c_t, 4)
+        # A request sent after the cut that fails again is a new event
+        controller.record_failure(time.monotonic())
+        self.assertEqual(controller.c_t, 2)
+
+    def test_retried_failures_do_not_trip_the_circuit(self):
+        controller = make_controller()
+        for _ in range(10):
+            controller.record_failure()
+        self.assertFalse(controller.circuit_open)
+
+    def test_circuit_opens_after_consecutive_give_ups(self):
+        controller = make_controller()
+        controller.record_give_up()
+        controller.record_give_up()
+        self.assertFalse(controller.circuit_open)
+        controller.record_give_up()
+        self.assertTrue(controller.circuit_open)
+
+    def test_success_resets_the_give_up_streak(self):
+        controller = make_controller()
+        controller.record_give_up()
+        controller.record_give_up()
+        controller.record_success(0.1)
+        controller.record_give_up()
+        self.assertFalse(controller.circuit_open)
+
+    def test_in_flight_requests_never_exceed_the_limit(self):
+        controller = make_controller(initial=3)
+        peak = 0
+
+        async def request():
+            nonlocal peak
+            async with controller:
+                peak = max(peak, controller.in_flight)
+                await asyncio.sleep(0.01)
+
+        async def run():
+            await asyncio.gather(*(request() for _ in range(20)))
+
+        asyncio.run(run())
+        self.assertEqual(peak, 3)
+        self.assertEqual(controller.in_flight, 0)
+
+    def test_reusable_across_event_loops(self):
+        controller = make_controller()
+
+        async def request():
+            async with controller:
+                pass
+
+        asyncio.run(request())
+        asyncio.run(request())
+        self.assertEqual(controller.in_flight, 0)
+
+
+class CircuitBreakerTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.hits = 0
+
+        async def unavailable(request):
+            self.hits += 1
+            return web.Response(status=503)
+
+        app = web.Application()
+        app.router.add_get("/search", unavailable)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = self.runner.addresses[0][1]
+        self.url = f"http://127.0.0.1:{port}/search"
+
+    async def asyncTearDown(self):
+        await self.runner.cleanup()
+
+    async def test_requests_stop_once_the_circuit_opens(self):
+        client = SAMGovClient(make_config(
+            sam_rate_limit=1000, sam_max_retries=1, sam_retry_backoff=0, sam_circuit_break_after=3
+        ))
+        try:
+            for _ in range(3):
+                (await client._request("GET", self.url)).release()
+            with self.assertRaisesRegex(Exception, "circuit breaker open"):
+                await client._request("GET", self.url)
+        finally:
+            await client.close()
+        # Three requests with one retry each; the fourth never reaches the server
+        self.assertEqual(self.hits, 6)
+
+    async def test_retries_exhausted_returns_the_last_response(self):
+        client = SAMGovClient(make_config(
+            sam_rate_limit=1000, sam_max_retries=2, sam_retry_backoff=0, sam_circuit_break_after=10
+        ))
+        try:
+            response = await client._request("GET", self.url)
+            self.assertEqual(response.status, 503)
+            response.release()
+        finally:
+            await client.close()
+        self.assertEqual(self.hits, 3)
+
+
+
+class ThrottlingBurstTest(unittest.IsolatedAsyncioTestCase):
+    """
+    SAM.gov answers the concurrent pages with 429 and Retry-After: 1 for a
+    short window starting at the first page request, then recovers
+    """
+
+    THROTTLE_SECONDS = 1.5
+    TOTAL_RECORDS = 100
+
+    async def asyncSetUp(self):
+        self.in_flight = 0
+        self.retry_peak = 0
+        self.throttled = 0
+        self.started = None
+
+        async def search(request):
+            offset = int(request.query["offset"])
+            if offset and self.started is None:
+                self.started = time.monotonic()
+            if offset and time.monotonic() - self.started < self.THROTTLE_SECONDS:
+                self.throttled += 1
+                return web.Response(status=429, headers={"Retry-After": "1"})
+            self.in_flight += 1
+            self.retry_peak = max(self.retry_peak, self.in_flight)
+            try:
+                await asyncio.sleep(0.05)
+            finally:
+                self.in_flight -= 1
+            limit = int(request.query["limit"])
+            return web.json_response({
+                "totalRecords": self.TOTAL_RECORDS,
+                "opportunitiesData": [
+                    {"noticeId": f"N{i}"} for i in range(offset, min(offset + limit, self.TOTAL_RECORDS))
+                ],
+            })
+
+        app = web.Application()
+        app.router.add_get("/search", search)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = self.runner.addresses[0][1]
+        self.url = f"http://127.0.0.1:{port}/search"
+
+    async def asyncTearDown(self):
+        await self.runner.cleanup()
+
+    async def test_burst_is_absorbed_without_opening_the_circuit(self):
+        client = SAMGovClient(make_config(
+            sam_api_base_url=self.url,
+            sam_rate_limit=1000,
+            sam_initial_concurrency=8,
+            sam_circuit_break_after=10
+        ))
+        try:
+            opportunities = await client.fetch_all_opportunities_async(days_back=1)
+        finally:
+            await client.close()
+
+        self.assertEqual(len(opportunities), self.TOTAL_RECORDS)
+        self.assertGreater(self.throttled, 0)
+        # The burst cut the limit once, and retries respected the smaller limit
+        self.assertLessEqual(self.retry_peak, 5)
+        self.assertEqual(client._concurrency.consecutive_failures, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import tempfile
+import unittest
+
+import requests
+
+from sharepoint_integration.sharepoint_sam import SharePointClient
+from tests.fakes import FakeResponse, FakeSession
+from tests.helpers import make_config
+
+LIST_URL = "https://graph.microsoft.com/v1.0/sites/site-id/lists/list-id/items"
+FULL_URL = f"{LIST_URL}/delta?$expand=fields($select=NoticeId)"
+PAGE_2_URL = f"{LIST_URL}/delta?$skiptoken=page2"
+DELTA_URL = f"{LIST_URL}/delta?token=first"
+NEXT_DELTA_URL = f"{LIST_URL}/delta?token=second"
+
+
+def item(item_id, notice_id=None, **extra):
+    fields = {"NoticeId": notice_id} if notice_id else {}
+    return {"id": item_id, "fields": fields, **extra}
+
+
+class DeltaQueryTest(unittest.TestCase):
+    def setUp(self):
+        self.state_dir = tempfile.TemporaryDirectory()
+        self.client = SharePointClient(make_config(state_dir=self.state_dir.name))
+        self.client.access_token = "token"
+        self.client.site_id = "site-id"
+        self.client.list_id = "list-id"
+
+    def tearDown(self):
+        self.state_dir.cleanup()
+
+    def run_with(self, routes):
+        self.client._graph_session = FakeSession(routes)
+        return self.client.get_existing_notice_ids()
+
+    def full_enumeration(self):
+        return {
+            FULL_URL: [FakeResponse(body={
+                "value": [item("1", "N1"), item("2", "N2"), item("3")],
+                "@odata.nextLink": PAGE_2_URL,
+            })],
+            PAGE_2_URL: [FakeResponse(body={
+                "value": [item("4", "N4")],
+                "@odata.deltaLink": DELTA_URL,
+            })],
+        }
+
+    def test_first_run_reads_every_page(self):
+        self.assertEqual(self.run_with(self.full_enumeration()), {"N1", "N2", "N4"})
+        self.assertEqual(
+            self.client._load_delta_state(),
+            (DELTA_URL, {"1": "N1", "2": "N2", "4": "N4"})
+        )
+
+    def test_next_run_applies_only_the_changes(self):
+        self.run_with(self.full_enumeration())
+
+        notice_ids = self.run_with({
+            DELTA_URL: [FakeResponse(body={
+                "value": [
+                    item("1", deleted={"state": "deleted"}),
+                    item("2", **{"@removed": {"reason": "deleted"}}),
+                    item("4", "N4-renamed"),
+                    item("5", "N5"),
+                ],
+                "@odata.deltaLink": NEXT_DELTA_URL,
+            })],
+        })
+
+        self.assertEqual(notice_ids, {"N4-renamed", "N5"})
+        self.assertEqual(self.client._load_delta_state()[0], NEXT_DELTA_URL)
+        self.assertEqual([url for _, url, _ in self.client._graph_session.calls], [DELTA_URL])
+
+    def test_expired_delta_token_falls_back_to_a_full_read(self):
+        self.run_with(self.full_enumeration())
+
+        routes = self.full_enumeration()
+        routes[FULL_URL][0] = FakeResponse(body={
+            "value": [item("7", "N7")],
+            "@odata.deltaLink": NEXT_DELTA_URL,
+        })
+        routes[DELTA_URL] = [FakeResponse(status_code=410)]
+
+        # Items from the stale map must not survive the re-read
+        self.assertEqual(self.run_with(routes), {"N7"})
+        self.assertEqual(self.client._load_delta_state(), (NEXT_DELTA_URL, {"7": "N7"}))
+
+    def test_gone_on_a_full_read_is_raised(self):
+        with self.assertRaises(requests.exceptions.HTTPError):
+            self.run_with({FULL_URL: [FakeResponse(status_code=410)]})
+
+    def test_other_errors_are_raised(self):
+        self.run_with(self.full_enumeration())
+        with self.assertRaises(requests.exceptions.HTTPError):
+            self.run_with({DELTA_URL: [FakeResponse(status_code=500)]})
+        # The stored deltaLink is kept for the next attempt
+        self.assertEqual(self.client._load_delta_state()[0], DELTA_URL)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+from unittest import mock
+
+import orjson
+
+from sharepoint_integration.sharepoint_sam import GRAPH_BATCH_LIMIT, SharePointClient
+from tests.fakes import FakeResponse, FakeSession
+from tests.helpers import make_config
+
+BATCH_URL = "https://graph.microsoft.com/v1.0/$batch"
+
+
+def created(sub_id, item_id):
+    return {"id": sub_id, "status": 201, "body": {"id": item_id}}
+
+
+def throttled(sub_id, retry_after=None):
+    headers = {"Retry-After": retry_after} if retry_after is not None else {}
+    return {"id": sub_id, "status": 429, "headers": headers, "body": {"error": {"message": "Too many requests"}}}
+
+
+def failed(sub_id):
+    return {"id": sub_id, "status": 400, "body": {"error": {"message": "Invalid field"}}}
+
+
+class GraphBatchTest(unittest.TestCase):
+    def setUp(self):
+        self.client = SharePointClient(make_config())
+        self.client.access_token = "token"
+        self.client.site_id = "site-id"
+        self.client.list_id = "list-id"
+        sleep = mock.patch("sharepoint_integration.sharepoint_sam.time.sleep")
+        self.sleep = sleep.start()
+        self.addCleanup(sleep.stop)
+
+    def run_batch(self, fields, *batch_responses, **kwargs):
+        self.session = FakeSession({
+            BATCH_URL: [FakeResponse(body={"responses": responses}) for responses in batch_responses]
+        })
+        self.client._graph_session = self.session
+        return self.client.create_list_items_batch(fields, **kwargs)
+
+    def sent_requests(self, call):
+        return orjson.loads(self.session.calls[call][2]["data"])["requests"]
+
+    def test_sub_responses_map_back_to_inputs_in_any_order(self):
+        fields = [{"Title": "A"}, {"Title": "B"}, {"Title": "C"}]
+        results = self.run_batch(fields, [created("2", "item-c"), created("0", "item-a"), created("1", "item-b")])
+
+        self.assertEqual(results, [{"id": "item-a"}, {"id": "item-b"}, {"id": "item-c"}])
+        sent = self.sent_requests(0)
+        self.assertEqual([r["id"] for r in sent], ["0", "1", "2"])
+        self.assertEqual(sent[1]["url"], "/sites/site-id/lists/list-id/items")
+        self.assertEqual(sent[1]["body"], {"fields": {"Title": "B"}})
+
+    def test_failed_sub_requests_return_none(self):
+        results = self.run_batch([{"Title": "A"}, {"Title": "B"}], [created("0", "item-a"), failed("1")])
+        self.assertEqual(results, [{"id": "item-a"}, None])
+        self.assertEqual(len(self.session.calls), 1)
+
+    def test_throttled_sub_requests_are_resent_alone(self):
+        results = self.run_batch(
+            [{"Title": "A"}, {"Title": "B"}, {"Title": "C"}],
+            [created("0", "item-a"), throttled("1", "3"), throttled("2", "1")],
+            [created("1", "item-b"), created("2", "item-c")],
+        )
+
+        self.assertEqual(results, [{"id": "item-a"}, {"id": "item-b"}, {"id": "item-c"}])
+        self.assertEqual([r["id"] for r in self.sent_requests(1)], ["1", "2"])
+        # Waits for the longest Retry-After in the batch
+        self.sleep.assert_called_once_with(3.0)
+
+    def test_throttling_without_retry_after_backs_off_exponentially(self):
+        self.run_batch(
+            [{"Title": "A"}],
+            [throttled("0")],
+            [throttled("0")],
+            [created("0", "item-a")],
+        )
+        self.assertEqual([c.args[0] for c in self.sleep.call_args_list], [1, 2])
+
+    def test_still_throttled_after_max_retries_returns_none(self):
+        results = self.run_batch(
+            [{"Title": "A"}, {"Title": "B"}],
+            [created("0", "item-a"), throttled("1", "0")],
+            [throttled("1", "0")],
+            max_retries=1,
+        )
+        self.assertEqual(results, [{"id": "item-a"}, None])
+        self.assertEqual(len(self.session.calls), 2)
+
+    def test_rejects_more_than_the_batch_limit(self):
+        with self.assertRaises(ValueError):
+            self.client.create_list_items_batch([{"Title": "A"}] * (GRAPH_BATCH_LIMIT + 1))
+
+
+if __name__ == "__main__":
+    unittest.main()